@@ -5,6 +5,8 @@ import logging
 import numpy as np
 
 class HallOfFame:
+    max_records = 30
+
     def __init__(self, 
                  records: list[HallOfFameRecord] = None,
                  record_start: int = 0
@@ -21,11 +23,10 @@ class HallOfFame:
         return self.__memory
     
     def parse(self) -> np.ndarray[np.uint8]:
-        record_size = 0x3C * 6 + 4
-        max_records = 30
-        size = record_size * max_records
+        record_size = HallOfFameRecord.memory_size
+        size = record_size * self.max_records
         self.__memory = np.zeros(size, dtype=np.uint8)
         for i, record in enumerate(self.records):
-            index = ((i + self.record_start)%max_records) * record_size # FIFO
+            index = ((i + self.record_start)%self.max_records) * record_size # FIFO
             Memory.set_value(self.__memory, index, record.memory)
         return self.__memory
\ No newline at end of file
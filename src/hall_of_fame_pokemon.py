@@ -8,6 +8,8 @@ from common import SpeciesParser, MoveParser, CharacterParser, Memory, CHAR_ENCO
 class HallOfFamePokemon:
     """Class representing a Pokemon."""
 
+    memory_size = 0x3C
+
 
     def __init__(self,
                  species: Union[str, int] = 0,
@@ -69,7 +71,7 @@ class HallOfFamePokemon:
 
     def __create_memory(self) -> np.ndarray[np.uint8]:
         """Create a memory array to store the data."""
-        self.__memory = np.zeros(0x3C, dtype=np.uint8)
+        self.__memory = np.zeros(self.memory_size, dtype=np.uint8)
         attributes = self.__dict__
         index = 0
         for key, value in attributes.items():
@@ -7,6 +7,9 @@ from common import SpeciesParser, MoveParser, CharacterParser, Memory
 
 
 class HallOfFameRecord:
+    party_size = 6
+    memory_size = HallOfFamePokemon.memory_size * party_size + 4 # party and date
+
     def __init__(self, party: List[HallOfFamePokemon],
                  year: int = 2000, 
                  month: int = 1, 
@@ -28,12 +31,11 @@ class HallOfFameRecord:
 
 
     def parse(self) -> np.ndarray[np.uint8]:
-        party_size = 0x3C * 6
-        size = party_size + 4
-        self.__memory = np.zeros(size, dtype=np.uint8)
+        party_memory_size = HallOfFamePokemon.memory_size * self.party_size
+        self.__memory = np.zeros(self.memory_size, dtype=np.uint8)
         for i, pokemon in enumerate(self.party):
-            Memory.set_value(self.__memory, i * 0x3C, pokemon.memory)
-        Memory.set_value(self.__memory, party_size, np.uint16(self.year))
-        Memory.set_value(self.__memory, party_size + 2, np.uint8(self.month))
-        Memory.set_value(self.__memory, party_size + 3, np.uint8(self.day))
+            Memory.set_value(self.__memory, i * HallOfFamePokemon.memory_size, pokemon.memory)
+        Memory.set_value(self.__memory, party_memory_size, np.uint16(self.year))
+        Memory.set_value(self.__memory, party_memory_size + 2, np.uint8(self.month))
+        Memory.set_value(self.__memory, party_memory_size + 3, np.uint8(self.day))
         return self.__memory
@@ -0,0 +1,149 @@
+from simulator import Simulation, CompiledScript
+from hall_of_fame_pokemon import HallOfFamePokemon
+from hall_of_fame_record import HallOfFameRecord
+
+import logging
+import numpy as np
+from typing import Iterable, List, Dict
+
+POKEMON_FIELDS = [("species", 2),
+                  ("level", 1),
+                  ("forme", 1),
+                  ("pid", 4),
+                  ("trainer_id", 2),
+                  ("secret_id", 2),
+                  ("name", 0x16),
+                  ("trainer_name", 0x10),
+                  ("move1", 2),
+                  ("move2", 2),
+                  ("move3", 2),
+                  ("move4", 2),
+                  ("padding", 2)
+                  ]
+
+RECORD_FIELDS = [("year", 2),
+                 ("month", 1),
+                 ("day", 1)
+                 ]
+
+# keep the field layout in line with HallOfFamePokemon.parse and HallOfFameRecord.parse
+assert sum(size for _, size in POKEMON_FIELDS) == HallOfFamePokemon.memory_size
+assert (HallOfFamePokemon.memory_size * HallOfFameRecord.party_size
+        + sum(size for _, size in RECORD_FIELDS)) == HallOfFameRecord.memory_size
+
+class SensitivityAnalysis:
+    """
+    Analyses how much each byte of a Hall of Fame image contributes to the success rate.
+
+    Every byte is replaced by each of the given values and the success rate is recomputed.
+    Execution only depends on the distance between the pre-reset base and the base, so every
+    distance is executed once on the compiled image, tracing the commands it executes.
+    Replacing a byte only changes the commands spanning it, so for every replacement only the
+    distances whose trace spans that byte are executed again, on a script patched at that byte.
+    """
+    def __init__(self,
+                 simulation: Simulation,
+                 values: Iterable[int] = (0x00, 0xFF)
+                 ):
+        self.simulation = simulation
+        self.values = list(values)
+        self.success_rate = None
+        self.success_rates = None
+
+    def run(self) -> np.ndarray[np.float64]:
+        """
+        Computes the success rate for every byte of the image replaced by every value.
+
+        Returns:
+            np.ndarray[np.float64]: The success rates, indexed by byte offset and value index.
+        """
+        compiled_script = self.simulation.compiled_script
+        memory = compiled_script.memory
+        base_count = len(self.simulation.get_bases())
+        distances = np.arange(1 - base_count, base_count) * 4
+        weights = base_count - np.abs(distances) // 4 # number of base pairs sharing each distance
+        total_attempts = base_count ** 2
+
+        successes = np.zeros(distances.size, dtype=np.bool_)
+        coverage = np.zeros((distances.size, memory.size), dtype=np.bool_)
+        for i, distance in enumerate(distances):
+            trace = []
+            successes[i] = self.__execute(compiled_script, distance, trace)
+            for executed in set(trace):
+                index = executed + compiled_script.padding
+                if 0 <= index < compiled_script.command_sizes.size:
+                    end = executed + int(compiled_script.command_sizes[index])
+                    if end > 0: # commands ending before the image span none of its bytes
+                        coverage[i, max(executed, 0):end] = True
+        total_successes = int(np.dot(weights, successes))
+        self.success_rate = total_successes / total_attempts
+
+        self.success_rates = np.full((memory.size, len(self.values)), self.success_rate)
+        covered_offsets = np.nonzero(coverage.any(axis=0))[0]
+        logging.debug(f"{covered_offsets.size}/{memory.size} bytes are executed")
+        for offset in covered_offsets:
+            affected = np.nonzero(coverage[:, offset])[0]
+            for j, value in enumerate(self.values):
+                if memory[offset] == value:
+                    continue
+                patched_memory = memory.copy()
+                patched_memory[offset] = value
+                patched_script = compiled_script.patch(patched_memory, offset)
+                patched_successes = total_successes
+                for i in affected:
+                    patched_success = self.__execute(patched_script, distances[i])
+                    patched_successes += int(weights[i]) * (int(patched_success) - int(successes[i]))
+                self.success_rates[offset, j] = patched_successes / total_attempts
+        return self.success_rates
+
+    def __execute(self, compiled_script: CompiledScript, distance: int, trace: List[int] = None) -> bool:
+        simulation = self.simulation
+        hall_of_fame_offset = simulation.hall_of_fame_offset
+        execution_offsets = simulation.execution_offsets
+        return compiled_script.execute(distance + simulation.start_offset - hall_of_fame_offset,
+                                       distance + execution_offsets.get("min_offset") - hall_of_fame_offset,
+                                       distance + execution_offsets.get("max_offset") - hall_of_fame_offset,
+                                       simulation.range_limit,
+                                       simulation.execution_limit,
+                                       trace=trace)
+
+    def get_impacts(self) -> np.ndarray[np.float64]:
+        """Get the largest change in success rate caused by replacing each byte."""
+        if self.success_rates is None:
+            self.run()
+        return np.max(np.abs(self.success_rates - self.success_rate), axis=1)
+
+    def get_field_impacts(self) -> Dict[str, float]:
+        """Get the largest change in success rate caused by replacing a byte of each field."""
+        impacts = self.get_impacts()
+        field_impacts = {}
+        for record in range(impacts.size // HallOfFameRecord.memory_size):
+            index = record * HallOfFameRecord.memory_size
+            for pokemon in range(HallOfFameRecord.party_size):
+                for field, size in POKEMON_FIELDS:
+                    field_impacts[f"record {record + 1}, pokemon {pokemon + 1}, {field}"] = impacts[index:index + size].max()
+                    index += size
+            for field, size in RECORD_FIELDS:
+                field_impacts[f"record {record + 1}, {field}"] = impacts[index:index + size].max()
+                index += size
+        return field_impacts
+
+    def plot_heatmap(self, show_plot: bool = True) -> None:
+        import matplotlib.pyplot as plt
+        impacts = self.get_impacts()
+        logging.info(f"Success rate: {round(self.success_rate*100,2)}%")
+        for field, impact in self.get_field_impacts().items():
+            if impact > 0:
+                logging.info(f"{field}: {round(impact*100,2)}%")
+
+        plt.figure()
+        plt.imshow(impacts.reshape(-1, HallOfFameRecord.memory_size) * 100, aspect="auto", cmap="viridis", interpolation="nearest")
+        for pokemon in range(1, HallOfFameRecord.party_size + 1):
+            plt.axvline(pokemon * HallOfFamePokemon.memory_size - 0.5, color="white", linewidth=0.5)
+        plt.colorbar(label="Largest change in success rate (%)")
+        plt.title("Success rate impact per byte")
+        plt.xlabel("Byte in record")
+        plt.ylabel("Record")
+
+        if show_plot:
+            plt.show()
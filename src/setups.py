@@ -4,6 +4,7 @@ from hall_of_fame_record import HallOfFameRecord
 from hall_of_fame import HallOfFame
 
 from simulator import Simulation
+from sensitivity import SensitivityAnalysis
 import abc
 from typing import Union, Dict, List
 
@@ -25,6 +26,21 @@ class Setup(abc.ABC):
         """
         pass
 
+    @abc.abstractmethod
+    def get_simulation(self) -> Simulation:
+        """
+        Get the simulation of the setup
+        """
+        pass
+
+    def analyse_sensitivity(self, plot: bool = True) -> Dict[str, float]:
+        """
+        Analyse how much each field of the Hall of Fame affects the success rate of the setup
+        """
+        analysis = SensitivityAnalysis(self.get_simulation())
+        analysis.plot_heatmap(plot)
+        return analysis.get_field_impacts()
+
 class BackupSaveItemSetup(Setup):
     def get_offsets(self, key_items: Union[Dict, int], hm_items: Union[List, None] = None) -> Dict:
         """
@@ -52,7 +68,7 @@ class GyaradosSetup(BackupSaveItemSetup):
         self.author = "Jorik Devreese (RETIREglitch)"
 
 
-    def run(self, plot: bool = True) -> float:
+    def get_simulation(self) -> Simulation:
         # TM slot in item data of backup save file
         # This is the memory section used in current ASE setups
         mandatory_hm_items = ["HM01", "HM6"]
@@ -82,7 +98,10 @@ class GyaradosSetup(BackupSaveItemSetup):
 
         records = [record] * 3
         hall_of_fame = HallOfFame(records=records, record_start=27)
-        simulation = Simulation(execution_offsets=execution_offsets, hall_of_fame=hall_of_fame)
+        return Simulation(execution_offsets=execution_offsets, hall_of_fame=hall_of_fame)
+
+    def run(self, plot: bool = True) -> float:
+        simulation = self.get_simulation()
         success_log = simulation.simulate_full()
         simulation.plot_simulations(success_log, plot)
         return simulation.get_success_rate(success_log)
@@ -99,7 +118,7 @@ class KakunaSetup(BackupSaveItemSetup):
         self.author = "Jorik Devreese (RETIREglitch)"
 
 
-    def run(self, plot: bool = True) -> float:
+    def get_simulation(self) -> Simulation:
         # TM slot in item data of backup save file
         # This is the memory section used in current ASE setups
         mandatory_hm_items = ["HM01", "HM6"]
@@ -130,7 +149,10 @@ class KakunaSetup(BackupSaveItemSetup):
         # Note that the code expects 0-indexed records, so record_start = 27
 
         hall_of_fame = HallOfFame(records=records, record_start=27)
-        simulation = Simulation(execution_offsets=execution_offsets, hall_of_fame=hall_of_fame)
+        return Simulation(execution_offsets=execution_offsets, hall_of_fame=hall_of_fame)
+
+    def run(self, plot: bool = True) -> float:
+        simulation = self.get_simulation()
         success_log = simulation.simulate_full()
         simulation.plot_simulations(success_log, plot)
         return simulation.get_success_rate(success_log)
\ No newline at end of file
@@ -3,10 +3,11 @@ from hall_of_fame_record import HallOfFameRecord
 from hall_of_fame_pokemon import HallOfFamePokemon
 from common import Memory
 
+import copy
 import logging
 import json
 import numpy as np
-from typing import Union, List, Tuple, Dict
+from typing import Union, List, Tuple, Dict, Iterable, Iterator
 
 class CommandSimulator:
     @staticmethod
@@ -121,6 +122,17 @@ class ScriptSimulator:
         else:
             return CommandSimulator.advance_execution(memory, address, command)
         
+    def command_size(self, memory: np.ndarray[np.uint8], address: int) -> int:
+        """
+        Gets the number of bytes the command at an address spans, including its parameters.
+        This bounds the bytes advance_execution can read for that command.
+        """
+        command_id, _ = Memory.get_value_as_int(memory, address, 2)
+        command = self.script_data.get(command_id, None)
+        if command is None:
+            return 2
+        return 2 + sum(command.get("parameters").values())
+
     def command_aborts_execution(self, command: Dict) -> bool:
         if command is None:
             return True # invalid command
@@ -128,7 +140,136 @@ class ScriptSimulator:
             return True # return command
         return False
 
+class CompiledScript:
+    """
+    Pre-decoded script for a Hall of Fame image.
+
+    Every byte offset of the image is decoded once by the ScriptSimulator into the
+    offset of the next command, whether execution aborts there and how many bytes
+    the command spans, stored in contiguous arrays. Jumps are folded into the next
+    offset. Offsets are relative to the start of the image, so one compilation holds
+    for every base the image is placed at. Memory outside of the image is zeroed,
+    which decodes the same everywhere.
+    """
+    padding = 0x10 # longer than any command, so commands straddling the image edges are decoded too
+
+    def __init__(self, memory: np.ndarray[np.uint8], script_simulator: ScriptSimulator):
+        max_command_size = 2 + max(sum(command.get("parameters").values())
+                                   for command in script_simulator.script_data.values())
+        if max_command_size > self.padding:
+            raise ValueError(f"Command size {max_command_size} exceeds the padding of {self.padding}")
+        self.memory = memory.copy() # the image may be edited in place after compiling
+        self.script_simulator = script_simulator
+        size = memory.size + self.padding
+        self.next_offsets = np.zeros(size, dtype=np.int64)
+        self.aborts = np.zeros(size, dtype=np.bool_)
+        self.command_sizes = np.zeros(size, dtype=np.uint8)
+        self.__decode(0, size)
+        zero_advance, zero_success = script_simulator.advance_execution(np.zeros(self.padding, dtype=np.uint8), 0)
+        self.zero_advance = zero_advance
+        self.zero_aborts = not zero_success
+
+    def __decode(self, start: int, stop: int) -> None:
+        script_simulator = self.script_simulator
+        buffer = np.zeros(self.memory.size + 2 * self.padding, dtype=np.uint8)
+        buffer[self.padding:self.padding + self.memory.size] = self.memory
+        for index in range(max(start, 0), min(stop, self.next_offsets.size)):
+            address, success = script_simulator.advance_execution(buffer, index)
+            self.next_offsets[index] = address - self.padding
+            self.aborts[index] = not success
+            self.command_sizes[index] = script_simulator.command_size(buffer, index)
+
+    def patch(self, memory: np.ndarray[np.uint8], offset: int) -> "CompiledScript":
+        """
+        Compiles an image which only differs from the compiled one at a single byte.
+        Only the commands that can span that byte are decoded again.
+
+        Args:
+            memory (np.ndarray[np.uint8]): The modified image.
+            offset (int): The offset of the modified byte.
+
+        Returns:
+            CompiledScript: The compiled modified image.
+        """
+        patched = copy.copy(self)
+        patched.memory = memory.copy()
+        patched.next_offsets = self.next_offsets.copy()
+        patched.aborts = self.aborts.copy()
+        patched.command_sizes = self.command_sizes.copy()
+        index = offset + self.padding
+        patched.__decode(index - self.padding + 1, index + 1)
+        return patched
+
+    def advance_execution(self, offset: int) -> Tuple[int, bool]:
+        """
+        Advances the execution from an offset relative to the start of the image.
+
+        Args:
+            offset (int): The offset to advance the execution from.
+
+        Returns:
+            int: The new offset to execute from.
+            bool: Whether the execution should continue.
+        """
+        index = offset + self.padding
+        if 0 <= index < self.next_offsets.size:
+            return int(self.next_offsets[index]), not self.aborts[index]
+        return offset + self.zero_advance, not self.zero_aborts
+
+    def execute(self,
+                start_offset: int,
+                min_offset: int,
+                max_offset: int,
+                range_limit: int,
+                execution_limit: int,
+                trace: List[int] = None,
+                memory: np.ndarray[np.uint8] = None,
+                image_address: int = 0
+                ) -> bool:
+        """
+        Executes from an offset relative to the start of the image.
+
+        Negative addresses wrap around the memory array, so if the memory the image is
+        placed in is given, commands at those addresses are interpreted from it.
+        Otherwise they are decoded as zeroed memory.
+
+        Args:
+            start_offset (int): The offset to start execution from.
+            min_offset (int): The start of the success window.
+            max_offset (int): The end of the success window, inclusive.
+            range_limit (int): How far past start_offset execution may continue.
+            execution_limit (int): The maximum number of commands to execute.
+            trace (List[int]): If given, every executed offset is appended to it.
+            memory (np.ndarray[np.uint8]): The memory the image is placed in.
+            image_address (int): The address of the image in memory.
+
+        Returns:
+            bool: Whether execution reached the success window.
+        """
+        offset = start_offset
+        execution_count = 0
+        while (offset < start_offset + range_limit) and (execution_count < execution_limit):
+            if trace is not None:
+                trace.append(offset)
+            if (memory is not None and image_address + offset < 0):
+                address, success = self.script_simulator.advance_execution(memory, image_address + offset)
+                offset = address - image_address
+            else:
+                offset, success = self.advance_execution(offset)
+            if (not success):
+                return False
+
+            if (min_offset <= offset <= max_offset):
+                return True
+
+            execution_count += 1
+        return False
+
 class Simulation:
+    start_offset = 0x2EAF0
+    range_limit = 0x800
+    execution_limit = 1000
+
     def __init__(self,
                  execution_offsets: Dict[str, int] = None,
                  script_simulator: ScriptSimulator = ScriptSimulator(),
@@ -140,31 +281,51 @@ class Simulation:
         self.hall_of_fame = hall_of_fame
         self.hall_of_fame_offset = hall_of_fame_offset
         self.__memory_size = 0x2400000
+        self.__compiled_script = None
         
     def __reset_memory(self) -> None:
         self.__memory = np.zeros(self.__memory_size, dtype=np.uint8)
 
-    def __create_memory(self, base: int = 0x226D260) -> None:
+    def __create_memory(self, base: int = 0x226D260) -> Tuple[np.ndarray[np.uint8], int]:
         self.__reset_memory()
         index = base + self.hall_of_fame_offset
         size = self.hall_of_fame.memory.size
         self.__memory[index:index + size] = self.hall_of_fame.memory
+        self.__image_address = index
+        return self.__memory, self.__image_address
+
+    @property
+    def compiled_script(self) -> CompiledScript:
+        """The compiled Hall of Fame image, recompiled whenever the image changes."""
+        memory = self.hall_of_fame.memory
+        if self.__compiled_script is None or not np.array_equal(self.__compiled_script.memory, memory):
+            logging.debug("Hall of Fame image has not been compiled. Compiling.")
+            self.__compiled_script = CompiledScript(memory, self.script_simulator)
+        return self.__compiled_script
+
+    def get_bases(self, min_base: int = 0x226D260) -> range:
+        """Get the bases simulated, both before and after the reset."""
+        return range(min_base, min_base + 0x104, 4)
 
-    def get_success_rate(self, logs: Dict) -> float:
+    def __log_items(self, logs: Union[Dict, Iterable[Tuple[str, List]]]) -> Iterable[Tuple[str, List]]:
+        """Accepts both a full success log and the (base, log) pairs yielded by iterate_full."""
+        return logs.items() if isinstance(logs, dict) else logs
+
+    def get_success_rate(self, logs: Union[Dict, Iterable[Tuple[str, List]]]) -> float:
         total_successes = 0
         total_attempts = 0
-        for base, log in logs.items():
+        for base, log in self.__log_items(logs):
             successes = len([x for x in log if x])
             total_successes += successes
             total_attempts += len(log)
         return total_successes/total_attempts
 
-    def plot_simulations(self, logs: Dict, show_plot: bool = True) -> None:
+    def plot_simulations(self, logs: Union[Dict, Iterable[Tuple[str, List]]], show_plot: bool = True) -> None:
         import matplotlib.pyplot as plt
         total_successes = 0
         total_attempts = 0
         min_base = 0
-        for base, log in logs.items():
+        for base, log in self.__log_items(logs):
             if min_base == 0:
                 min_base = int(base,16)
             successes = len([x for x in log if x])
@@ -187,43 +348,84 @@ class Simulation:
             plt.show()
 
     def simulate_full(self, min_base:int = 0x226D260) -> Dict:
-        success_log = {}
-        for base in range(min_base, min_base + 0x104, 4):
-            success_log[hex(base)] = self.simulate_with_base(base)
-        return success_log
+        return dict(self.iterate_full(min_base))
+
+    def iterate_full(self,
+                     min_base:int = 0x226D260,
+                     min_success_rate: float = None,
+                     stop_on_failure: bool = False
+                     ) -> Iterator[Tuple[str, List]]:
+        """
+        Simulates every pre-reset base, yielding its success log as soon as it is computed.
+
+        Iteration terminates early once the total success rate can no longer reach
+        min_success_rate, or at the first failed attempt if stop_on_failure is set.
+        The log of the base during which this happens is yielded truncated, and later
+        bases are not yielded at all. The yielded logs are then partial, and
+        get_success_rate on them does not give the success rate of the setup.
+
+        Args:
+            min_base (int): The first pre-reset base to simulate.
+            min_success_rate (float): The total success rate the setup has to be able to reach.
+            stop_on_failure (bool): Whether to stop at the first failed attempt.
+
+        Yields:
+            str: The pre-reset base, in hex.
+            List: The success log of the attempts for that base.
+        """
+        bases = self.get_bases(min_base)
+        total_attempts = len(bases) ** 2
+        remaining_attempts = total_attempts
+        total_successes = 0
+        for base in bases:
+            success_log = []
+            for success in self.iterate_with_base(base):
+                success_log.append(success)
+                remaining_attempts -= 1
+                if success:
+                    total_successes += 1
+                elif stop_on_failure:
+                    yield hex(base), success_log
+                    return
+                if (min_success_rate is not None and
+                    (total_successes + remaining_attempts)/total_attempts < min_success_rate):
+                    logging.debug(f"Success rate of {min_success_rate} can no longer be reached, stopping at base {hex(base)}")
+                    yield hex(base), success_log
+                    return
+            yield hex(base), success_log
 
     def simulate_with_base(self, 
                            base_pre_reset: int, 
                            min_base:int = 0x226D260) -> List:
-        self.__create_memory(base_pre_reset)
-        success_log = []
-        for base in range(min_base, min_base + 0x104, 4):
-            success_log.append(self.simulate(base))
-        return success_log
+        return list(self.iterate_with_base(base_pre_reset, min_base))
+
+    def iterate_with_base(self,
+                          base_pre_reset: int,
+                          min_base:int = 0x226D260) -> Iterator[bool]:
+        memory, image_address = self.__create_memory(base_pre_reset)
+        for base in self.get_bases(min_base):
+            # another iterator may have placed its own image in the meantime
+            self.__memory, self.__image_address = memory, image_address
+            yield self.simulate(base)
 
     def simulate(self, 
                  base: int,
-                 offset: int = 0x2EAF0,
-                 range_limit: int = 0x800,
-                 execution_limit: int = 1000
+                 offset: int = None,
+                 range_limit: int = None,
+                 execution_limit: int = None
                  ) -> bool:
-        start_address = base + offset
-        address = start_address
+        offset = self.start_offset if offset is None else offset
+        range_limit = self.range_limit if range_limit is None else range_limit
+        execution_limit = self.execution_limit if execution_limit is None else execution_limit
 
-        min_address = base + self.execution_offsets.get("min_offset")
-        max_address = base + self.execution_offsets.get("max_offset")
-
-        execution_count = 0
-        while (address < start_address + range_limit) and (execution_count < execution_limit):
-            address, success = self.script_simulator.advance_execution(self.__memory, address)
-            if (not success):
-                return False
-            
-            if (min_address <= address <= max_address):
-                return True
-            
-            execution_count += 1
-        return False
+        image_address = self.__image_address
+        return self.compiled_script.execute(base + offset - image_address,
+                                            base + self.execution_offsets.get("min_offset") - image_address,
+                                            base + self.execution_offsets.get("max_offset") - image_address,
+                                            range_limit,
+                                            execution_limit,
+                                            memory=self.__memory,
+                                            image_address=image_address)
             
 
 if __name__ == "__main__":